@@ -1,10 +1,14 @@
+import json
 import os
+import threading
 import time
 import unittest
 from random import randrange
+from unittest import mock
 
 import requests
 
+import vault_client.client
 from vault_client import VaultClient
 
 vault_addr = os.environ.get("VAULT_ADDR")
@@ -65,6 +69,194 @@ class VaultClientTests(unittest.TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(new_test_value, result)
 
+    def test_kv_v2_read_refreshed_at_renewal_point(self):
+
+        # Write a random value to kv-v2 with 3 second TTL
+        test_value = str(randrange(15))
+        secret_name = "kv_v2_read_refreshed"
+        kv_path = f"/v1/secret/data/{secret_name}"
+        kv_data = {"data": {"foo": test_value, "ttl": "3"}}
+        resp = session.post(url=vault_addr + kv_path, json=kv_data)
+        self.assertEqual(resp.status_code, 200)
+
+        vc = VaultClient()
+        result = vc.read_kv(secret_name, "foo")
+        self.assertEqual(test_value, result)
+
+        # Write a new random value to kv-v2 with 3 second TTL
+        new_test_value = str(randrange(15, 30))
+        kv_data = {"data": {"foo": new_test_value, "ttl": "3"}}
+        resp = session.post(url=vault_addr + kv_path, json=kv_data)
+        self.assertEqual(resp.status_code, 200)
+
+        # Past two thirds of the TTL the cached value is still returned, but the
+        # read starts a background update of the secret
+        time.sleep(2.2)
+        result = vc.read_kv(secret_name, "foo")
+        self.assertEqual(test_value, result)
+
+        # Once the update finished, the new value is returned well before the
+        # original lease ends and is not held in cache past it
+        time.sleep(0.5)
+        result = vc.read_kv(secret_name, "foo")
+        self.assertEqual(new_test_value, result)
+        time.sleep(0.5)
+        result = vc.read_kv(secret_name, "foo")
+        self.assertEqual(new_test_value, result)
+
+    @unittest.skipIf(
+        vault_client.client._ORJSON, "orjson reads wide integers as floats"
+    )
+    def test_kv_v2_read_wide_int(self):
+
+        # Write an integer wider than 64 bits to kv-v2
+        test_value = 2**70 + randrange(15)
+        kv_path = "/v1/secret/data/kv_v2_read_wide_int"
+        kv_data = {"data": {"foo": test_value}}
+        resp = session.post(url=vault_addr + kv_path, json=kv_data)
+        self.assertEqual(resp.status_code, 200)
+
+        vc = VaultClient()
+        result = vc.read_kv("kv_v2_read_wide_int", "foo")
+        self.assertEqual(test_value, result)
+        self.assertIsInstance(result, int)
+
+    @unittest.skipIf(vault_client.client._ORJSON, "orjson writes compact JSON")
+    def test_read_object_json(self):
+
+        # Write a nested object to kv-v2
+        test_value = {"foo": str(randrange(15)), "bar": randrange(15)}
+        kv_path = "/v1/secret/data/read_object_json"
+        kv_data = {"data": {"obj": test_value}}
+        resp = session.post(url=vault_addr + kv_path, json=kv_data)
+        self.assertEqual(resp.status_code, 200)
+
+        # Object values are returned in the json.dumps format
+        vc = VaultClient()
+        result = vc.read("secret/data/read_object_json", "data.data.obj")
+        self.assertEqual(json.dumps(test_value, default=str), result)
+
+    def test_kv_v2_read_many(self):
+
+        # Write random values to two kv-v2 secrets
+        test_values = {}
+        for secret_name in ["kv_v2_read_many_a", "kv_v2_read_many_b"]:
+            test_values[secret_name] = (str(randrange(15)), str(randrange(15)))
+            kv_path = f"/v1/secret/data/{secret_name}"
+            foo, bar = test_values[secret_name]
+            kv_data = {"data": {"foo": foo, "bar": bar}}
+            resp = session.post(url=vault_addr + kv_path, json=kv_data)
+            self.assertEqual(resp.status_code, 200)
+
+        # Each distinct secret is fetched from Vault once
+        vc = VaultClient()
+        with mock.patch(
+            "vault_client.client._send", wraps=vault_client.client._send
+        ) as send:
+            result = vc.read_many(
+                [
+                    ("kv_v2_read_many_a", "foo"),
+                    ("kv_v2_read_many_a", "bar"),
+                    ("kv_v2_read_many_b", "foo"),
+                    ("kv_v2_read_many_b", "bar"),
+                ]
+            )
+
+        secret_gets = sorted(
+            call.args[1][len(vault_addr) :]
+            for call in send.call_args_list
+            if call.args[0] == "GET"
+        )
+        self.assertEqual(
+            [
+                "/v1/secret/data/kv_v2_read_many_a",
+                "/v1/secret/data/kv_v2_read_many_b",
+            ],
+            secret_gets,
+        )
+        self.assertEqual(
+            [
+                *test_values["kv_v2_read_many_a"],
+                *test_values["kv_v2_read_many_b"],
+            ],
+            result,
+        )
+
+    def test_kv_v2_read_small_cache(self):
+
+        # Write random values to two kv-v2 secrets
+        test_values = {}
+        for secret_name in ["kv_v2_read_small_cache_a", "kv_v2_read_small_cache_b"]:
+            test_values[secret_name] = str(randrange(15))
+            kv_path = f"/v1/secret/data/{secret_name}"
+            kv_data = {"data": {"foo": test_values[secret_name]}}
+            resp = session.post(url=vault_addr + kv_path, json=kv_data)
+            self.assertEqual(resp.status_code, 200)
+
+        # Each read evicts the other secret, so every value must still be
+        # fetched and cached under its own key
+        vc = VaultClient(secret_cache_size=1, kv_cache_size=1)
+        for _ in range(2):
+            for secret_name, test_value in test_values.items():
+                result = vc.read_kv(secret_name, "foo")
+                self.assertEqual(test_value, result)
+                result = vc.read_kv(secret_name, "foo")
+                self.assertEqual(test_value, result)
+
+    def test_kv_v2_read_no_kv_cache(self):
+
+        # Write a random value to kv-v2
+        test_value = str(randrange(15))
+        secret_name = "kv_v2_read_no_kv_cache"
+        kv_path = f"/v1/secret/data/{secret_name}"
+        kv_data = {"data": {"foo": test_value}}
+        resp = session.post(url=vault_addr + kv_path, json=kv_data)
+        self.assertEqual(resp.status_code, 200)
+
+        # With the KV value cache disabled every read goes through the secret
+        vc = VaultClient(kv_cache_size=0)
+        for _ in range(2):
+            result = vc.read_kv(secret_name, "foo")
+            self.assertEqual(test_value, result)
+        self.assertEqual(0, len(vc._VaultClient__kv_cache))
+
+    def test_kv_v2_read_concurrent(self):
+
+        # Write a random value to kv-v2
+        test_value = str(randrange(15))
+        secret_name = "kv_v2_read_concurrent"
+        kv_path = f"/v1/secret/data/{secret_name}"
+        kv_data = {"data": {"foo": test_value}}
+        resp = session.post(url=vault_addr + kv_path, json=kv_data)
+        self.assertEqual(resp.status_code, 200)
+
+        vc = VaultClient()
+        readers = 8
+        barrier = threading.Barrier(readers)
+        results = []
+
+        def read():
+            barrier.wait()
+            results.append(vc.read_kv(secret_name, "foo"))
+
+        # Concurrent first reads of a secret share a single Vault request
+        with mock.patch(
+            "vault_client.client._send", wraps=vault_client.client._send
+        ) as send:
+            threads = [threading.Thread(target=read) for _ in range(readers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        secret_gets = [
+            call
+            for call in send.call_args_list
+            if call.args[0] == "GET" and call.args[1].endswith(kv_path)
+        ]
+        self.assertEqual(1, len(secret_gets))
+        self.assertEqual([test_value] * readers, results)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,96 +1,325 @@
 import json
 import logging
+import operator
 import os
+import ssl
+import sys
 import threading
-from dataclasses import dataclass
-from datetime import datetime
-from typing import List, Any, Union, Optional, Dict
-from urllib.parse import urlencode
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Any, Union, Optional, Dict, Tuple, Callable
+from urllib.parse import urlencode, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+import urllib3
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # type: ignore
+
+_LOG = logging.getLogger(__name__)
+
+
+def _use_orjson() -> bool:
+    # orjson is faster but reads integers wider than 64 bits as floats, so it is
+    # opt-in through VAULT_ORJSON rather than used whenever it can be imported.
+    if os.getenv("VAULT_ORJSON", default="").lower() not in ("1", "true", "yes"):
+        return False
+    if orjson is None:
+        _LOG.warning("VAULT_ORJSON is set but orjson is not installed, using json.")
+        return False
+    return True
+
+
+_ORJSON = _use_orjson()
+_json_loads = orjson.loads if _ORJSON else json.loads
+
+
+def _json_dumps_bytes(obj: Any) -> bytes:
+    if _ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _json_dumps_str(obj: Any) -> str:
+    # orjson output is compact, the stdlib fallback keeps the original json.dumps format
+    if _ORJSON:
+        return orjson.dumps(obj, default=str).decode()
+    return json.dumps(obj, default=str)
+
+
+def _pool_options() -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "num_pools": 10,
+        "maxsize": 20,
+        "retries": False,
+        "timeout": urllib3.Timeout(connect=3, read=3),
+    }
+    # Same CA bundle variables requests honoured, plus the Vault CLI's own
+    ca_bundle = (
+        os.getenv("VAULT_CACERT")
+        or os.getenv("REQUESTS_CA_BUNDLE")
+        or os.getenv("CURL_CA_BUNDLE")
+    )
+    if ca_bundle:
+        if os.path.isdir(ca_bundle):
+            options["ca_cert_dir"] = ca_bundle
+        else:
+            options["ca_certs"] = ca_bundle
+    return options
+
+
+_POOL_OPTIONS = _pool_options()
+_POOL = urllib3.PoolManager(**_POOL_OPTIONS)
+# HTTP(S)_PROXY / NO_PROXY from the environment, as requests used them
+_PROXIES = getproxies()
+_PROXIED = any(scheme != "no" for scheme in _PROXIES)
+
+
+@lru_cache(maxsize=None)
+def _proxy_manager(proxy_url: str) -> urllib3.ProxyManager:
+    return urllib3.ProxyManager(proxy_url, **_POOL_OPTIONS)
 
-import requests
+
+@lru_cache(maxsize=64)
+def _pool_for_origin(scheme: str, netloc: str) -> urllib3.PoolManager:
+    proxy_url = _PROXIES.get(scheme)
+    if not proxy_url or proxy_bypass(netloc):
+        return _POOL
+    return _proxy_manager(proxy_url)
+
+
+def _pool_for(url: str) -> urllib3.PoolManager:
+    if not _PROXIED:
+        return _POOL
+    parts = urlsplit(url)
+    return _pool_for_origin(parts.scheme, parts.netloc)
+
+
+def _new_http2_client() -> Optional["httpx.Client"]:
+    # HTTP/2 lets concurrent requests share one connection. It is opt-in through
+    # VAULT_HTTP2 and needs httpx and h2. trust_env is off and the CA bundle is
+    # passed explicitly so TLS settings are the same as with the urllib3 pool.
+    if os.getenv("VAULT_HTTP2", default="").lower() not in ("1", "true", "yes"):
+        return None
+    if _PROXIED:
+        _LOG.warning("VAULT_HTTP2 is not supported through a proxy, using HTTP/1.1.")
+        return None
+    if httpx is None:
+        _LOG.warning("VAULT_HTTP2 is set but httpx is not installed, using HTTP/1.1.")
+        return None
+    try:
+        verify = ssl.create_default_context(
+            cafile=_POOL_OPTIONS.get("ca_certs"),
+            capath=_POOL_OPTIONS.get("ca_cert_dir"),
+        )
+        return httpx.Client(
+            http2=True,
+            timeout=3,
+            follow_redirects=False,
+            trust_env=False,
+            verify=verify,
+        )
+    except ImportError:
+        _LOG.warning("VAULT_HTTP2 is set but h2 is not installed, using HTTP/1.1.")
+        return None
+
+
+_HTTP2_CLIENT = _new_http2_client()
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="vault-renew")
+# read_many prefetches, kept apart from renewals so a large batch cannot delay them
+_READ_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vault-read")
+_HTTP_METHODS = {"get": "GET", "post": "POST"}
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# dataclass(slots=True) is only available from Python 3.10
+_DATACLASS_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 def http_get(
     url: str, headers: Optional[dict] = None, data: Optional[dict] = None,
 ):
-    return http_request("get", url=url, headers=headers, data=data)
+    return _request("GET", url, headers, data)
 
 
 def http_post(
     url: str, headers: Optional[dict] = None, data: Optional[dict] = None,
 ):
-    return http_request("post", url=url, headers=headers, data=data)
+    return _request("POST", url, headers, data)
 
 
 def http_request(
     method: str, url: str, headers: Optional[dict] = None, data: Optional[dict] = None,
 ):
-    try:
-        if method.lower() == "get":
-            response = requests.get(
-                url, headers=headers, data=data, allow_redirects=False, timeout=3
-            )
-        elif method.lower() == "post":
-            response = requests.post(
-                url, headers=headers, data=data, allow_redirects=False, timeout=3
-            )
-        else:
-            return None
+    http_method = _HTTP_METHODS.get(method.lower())
+    if http_method is None:
+        return None
+    return _request(http_method, url, headers, data)
 
-        if response.status_code == 404:
-            logging.debug("Secret or path not found in Vault.")
-            return None
-        elif response.status_code == 403:
-            raise PermissionError(
-                "Access to Vault secret denied. Check the token, authentication method, or policies."
-            )
-        elif response.status_code == 307:
-            logging.error(
-                "Vault request was not successful. Request may have been sent to a Vault standby server."
-            )
-            return None
-        elif response.status_code == 502:
-            logging.debug("Vault request was throttled.")
-            return None
-        elif 300 <= response.status_code < 500:
-            logging.warning(
-                "Unexpected response. The Vault client is not configured to handle redirects: "
-                + f"{response.status_code} : {response.headers} : {response.text}"
-            )
-            return None
-        elif response.status_code >= 500:
-            logging.error(f"Error occurred while accessing Vault: {response.text}")
-            return None
 
-        return response.json()
+def _request(
+    http_method: str, url: str, headers: Optional[dict], data: Optional[dict]
+):
+    try:
+        body = None
+        if data:
+            body = _json_dumps_bytes(data)
+            headers = {**headers, **_JSON_HEADERS} if headers else _JSON_HEADERS
+        return _handle_response(*_send(http_method, url, body, headers))
     except Exception as e:
-        logging.error(e)
+        _LOG.error(e)
         return None
 
 
-def dotted_get(path: Union[str, List[str]], obj: dict):
-    if isinstance(path, str):
-        path = path.split(".")
-    item = obj.get(path[0], None)
-    if item and len(path) > 1:
-        return dotted_get(path[1:], item)
+def _handle_response(status: int, response_headers: Any, response_data: bytes):
+    if status == 404:
+        _LOG.debug("Secret or path not found in Vault.")
+        return None
+    elif status == 403:
+        raise PermissionError(
+            "Access to Vault secret denied. Check the token, authentication method, or policies."
+        )
+    elif status == 307:
+        _LOG.error(
+            "Vault request was not successful. Request may have been sent to a Vault standby server."
+        )
+        return None
+    elif status == 502:
+        _LOG.debug("Vault request was throttled.")
+        return None
+    elif 300 <= status < 500:
+        # Only decode the body when the record will actually be emitted
+        body = (
+            response_data.decode(errors="replace")
+            if _LOG.isEnabledFor(logging.WARNING)
+            else ""
+        )
+        _LOG.warning(
+            "Unexpected response. The Vault client is not configured to handle redirects: "
+            "%s : %s : %s",
+            status,
+            response_headers,
+            body,
+        )
+        return None
+    elif status >= 500:
+        body = (
+            response_data.decode(errors="replace")
+            if _LOG.isEnabledFor(logging.ERROR)
+            else ""
+        )
+        _LOG.error("Error occurred while accessing Vault: %s", body)
+        return None
+
+    return _json_loads(response_data)
+
+
+def _send(
+    http_method: str, url: str, body: Optional[bytes], headers: Optional[dict]
+) -> Tuple[int, Any, bytes]:
+    if _HTTP2_CLIENT is not None:
+        r = _HTTP2_CLIENT.request(http_method, url, content=body, headers=headers)
+        return r.status_code, r.headers, r.content
+    response = _pool_for(url).urlopen(
+        http_method, url, body=body, headers=headers, redirect=False
+    )
+    return response.status, response.headers, response.data
+
+
+@lru_cache(maxsize=128)
+def _split_path(path: str) -> Tuple[str, ...]:
+    return tuple(path.split("."))
+
+
+def dotted_get(path: Union[str, List[str], Tuple[str, ...]], obj: dict):
+    keys = _split_path(path) if isinstance(path, str) else path
+    item: Any = obj
+    for k in keys:
+        if not isinstance(item, dict):
+            return None
+        item = item.get(k)
+        if item is None:
+            return None
     return item
 
 
+def _compile_path(path: str) -> Callable[[dict], Any]:
+    keys = _split_path(path)
+
+    if len(keys) == 1:
+        # Top-level fields are a single dict lookup, skip the loop entirely
+        return operator.methodcaller("get", keys[0])
+
+    if len(keys) == 2:
+        first, second = keys
+
+        def getter(obj: dict) -> Any:
+            item = obj.get(first)
+            return item.get(second) if isinstance(item, dict) else None
+
+    elif len(keys) == 3:
+        first, second, third = keys
+
+        def getter(obj: dict) -> Any:
+            item = obj.get(first)
+            if not isinstance(item, dict):
+                return None
+            item = item.get(second)
+            return item.get(third) if isinstance(item, dict) else None
+
+    else:
+
+        def getter(obj: dict) -> Any:
+            item: Any = obj
+            for k in keys:
+                if not isinstance(item, dict):
+                    return None
+                item = item.get(k)
+            return item
+
+    return getter
+
+
+_GET_RENEWABLE = _compile_path("renewable")
+_GET_LEASE_DURATION = _compile_path("lease_duration")
+_GET_LEASE_ID = _compile_path("lease_id")
+_GET_KV2_TTL = _compile_path("data.data.ttl")
+_GET_AUTH_TOKEN = _compile_path("auth.client_token")
+_GET_AUTH_ACCESSOR = _compile_path("auth.accessor")
+_GET_AUTH_LEASE_DURATION = _compile_path("auth.lease_duration")
+_GET_AUTH_POLICIES = _compile_path("auth.policies")
+
+
 class VaultClient:
     __vault_addr: str
+    __base_v1: str
+    __renew_url: str
     __vault_token: str
+    __vault_headers: Dict[str, str]
     __vault_namespace: str
     __vault_accessor: str
     __auth_method: str
     __auth_path: str
     __auth_role: str
-    __vault_policies: List[str] = []
-    __vault_token_lease_time: datetime
-    __vault_token_lease_duration: int = 0
-    __authenticated: bool = False
-    __secrets: Dict[str, "VaultClient.VaultSecret"] = {}
+    __vault_policies: List[str]
+    __vault_token_lease_time: float
+    __vault_token_lease_duration: int
+    __authenticated: bool
+    __secrets: "OrderedDict[str, VaultClient.VaultSecret]"
+    __kv_cache: "OrderedDict[Tuple[str, str, int, str, int], Tuple[Any, float]]"
+    __inflight: Dict[str, threading.Event]
+    __inflight_lock: threading.Lock
     __default_kvv2_ttl: int = 300
+    __secret_cache_size: int = 256
+    __kv_cache_size: int = 1024
 
     def get_auth_method(self) -> str:
         return self.__auth_method
@@ -127,12 +356,18 @@ class VaultClient:
 
     def set_vault_addr(self, vault_addr) -> None:
         self.__vault_addr = vault_addr
+        self.__base_v1 = (vault_addr or "") + "/v1"
+        self.__renew_url = self.__base_v1 + "/sys/leases/renew"
+        # Cached secrets carry URLs for the previous address
+        self.__secrets.clear()
+        self.__kv_cache.clear()
 
     def set_vault_namespace(self, vault_namespace) -> None:
         self.__vault_namespace = vault_namespace
 
     def set_vault_token(self, vault_token) -> None:
         self.__vault_token = vault_token
+        self.__vault_headers["X-Vault-Token"] = vault_token
 
     def __init__(
         self,
@@ -142,22 +377,33 @@ class VaultClient:
         auth_path: str = "",
         auth_role: str = "",
         default_kv_v2_ttl: int = __default_kvv2_ttl,
+        secret_cache_size: int = __secret_cache_size,
+        kv_cache_size: int = __kv_cache_size,
     ):
-        self.__vault_addr = vault_addr
+        self.__secrets = OrderedDict()
+        self.__kv_cache = OrderedDict()
+        self.set_vault_addr(vault_addr or os.getenv("VAULT_ADDR", default=""))
         self.__vault_namespace = vault_namespace
         self.__auth_method = auth_method
         self.__auth_path = auth_path
         self.__auth_role = auth_role
         self.__default_kvv2_ttl = default_kv_v2_ttl
-        self.__vault_token = os.getenv("VAULT_TOKEN", default="")
-        if not self.__vault_addr:
-            self.__vault_addr = os.getenv("VAULT_ADDR", default="")
+        self.__secret_cache_size = secret_cache_size
+        self.__kv_cache_size = kv_cache_size
+        self.__vault_accessor = ""
+        self.__vault_policies = []
+        self.__vault_headers = {}
+        self.set_vault_token(os.getenv("VAULT_TOKEN", default=""))
+        self.__authenticated = False
+        self.__inflight = {}
+        self.__inflight_lock = threading.Lock()
+        self.__vault_token_lease_time = 0.0
+        self.__vault_token_lease_duration = 0
         if not self.__vault_namespace:
             self.__vault_namespace = os.getenv("VAULT_NAMESPACE", default="")
 
         if self.__vault_token and self.__vault_addr:
-            logging.debug("Using existing Token for authentication.")
-            self.__vault_token_lease_duration = 0
+            _LOG.debug("Using existing Token for authentication.")
             self.__authenticated = True
 
     def read_kv(
@@ -168,33 +414,89 @@ class VaultClient:
         mount_path: str = "/secret",
         kv_version: int = 2,
     ) -> Any:
+        cache_key = (mount_path, name, version, key, kv_version)
+        cached = self.__kv_cache.get(cache_key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
         if kv_version == 1:
             path = f"{mount_path}/{name}"
             kv_key = f"data.{key}"
-            return self.read(path, kv_key)
         elif kv_version == 2:
-            path = f"{mount_path}/data/{name}?version={version}"
+            path = f"{mount_path}/data/{name}"
+            if version:
+                path += f"?version={version}"
             kv_key = f"data.data.{key}"
-            return self.read(path, kv_key)
         else:
-            logging.error("Unknown Key-Value secret engine version")
-        return None
+            _LOG.error("Unknown Key-Value secret engine version")
+            return None
+
+        value, expires = self.__read(path, kv_key)
+        if value is not None and expires > time.monotonic():
+            self.__cache_kv_value(cache_key, value, expires)
+        return value
+
+    def read_many(self, items: List[Tuple[Any, ...]]) -> List[Any]:
+        # Each item holds read_kv arguments: (name, key[, version, mount_path, kv_version]).
+        # Items are grouped by secret and each distinct secret is fetched once, in
+        # parallel, before the keys are pulled from the cached responses. Caching is
+        # per secret, so no more requests are issued than there are distinct secrets.
+        def secret_id(name, key, version=0, mount_path="/secret", kv_version=2):
+            return name, version, mount_path, kv_version
+
+        # Index of the first item for each distinct secret
+        groups: Dict[tuple, int] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(secret_id(*item), index)
+
+        results: Dict[int, Any] = {}
+        if len(groups) > 1:
+            if not self.__authenticated:
+                self.login()
+            futures = {
+                index: _READ_EXECUTOR.submit(self.read_kv, *items[index])
+                for index in groups.values()
+            }
+            results = {index: future.result() for index, future in futures.items()}
+
+        return [
+            results[index] if index in results else self.read_kv(*item)
+            for index, item in enumerate(items)
+        ]
+
+    def __cache_kv_value(self, cache_key: tuple, value: Any, expires: float) -> None:
+        # Cached values expire at the lease renewal point so that the next read
+        # still goes through __read_element and triggers the background update.
+        if self.__kv_cache_size <= 0:
+            # A size of 0 disables the KV value cache
+            return
+        kv_cache = self.__kv_cache
+        if cache_key not in kv_cache and len(kv_cache) >= self.__kv_cache_size:
+            # Drop the oldest entry to keep the cache bounded
+            try:
+                kv_cache.popitem(last=False)
+            except KeyError:
+                # Another thread emptied the cache first
+                pass
+        kv_cache[cache_key] = (value, expires)
 
     def read(self, path: str, key: str) -> Any:
-        value = self.__read_element(path, key)
-        if value:
-            if type(value) in [int, str, float]:
-                return value
-            else:
-                return json.dumps(value, default=str)
-        return None
+        return self.__read(path, key)[0]
+
+    def __read(self, path: str, key: str) -> Tuple[Any, float]:
+        value, expires = self.__read_element(path, key)
+        if value is None:
+            return None, 0.0
+        if isinstance(value, (str, int, float)):
+            return value, expires
+        return _json_dumps_str(value), expires
 
     def login(self) -> bool:
-        logging.debug("Performing Auth")
+        _LOG.debug("Performing Auth")
         result: bool = False
 
         if not self.__auth_path:
-            logging.debug("Auth path null")
+            _LOG.debug("Auth path null")
             self.__auth_path = self.__auth_method
 
         if self.__auth_method == "gcp":
@@ -208,7 +510,7 @@ class VaultClient:
             return True
 
     def login_gcp(self) -> bool:
-        logging.debug("Performing GCP Login")
+        _LOG.debug("Performing GCP Login")
         google_headers: dict = {"Metadata-Flavor": "Google"}
         google_url_params: str
         google_metadata_url: str
@@ -225,186 +527,214 @@ class VaultClient:
             "http://metadata/computeMetadata/v1/instance/service-accounts/default/identity?"
             + google_url_params
         )
-        jwt = requests.get(google_metadata_url, headers=google_headers).text
+        jwt = (
+            _pool_for(google_metadata_url)
+            .request("GET", google_metadata_url, headers=google_headers)
+            .data.decode()
+        )
 
         return self.login_jwt(jwt)
 
     def login_jwt(self, jwt: str) -> bool:
-        logging.debug("Performing JWT Login")
+        _LOG.debug("Performing JWT Login")
         login_result_json: str
-        login_path = f"/v1/auth/{self.__auth_path}/login"
+        login_path = f"/auth/{self.__auth_path}/login"
         vault_login_jwt_data = {"role": self.__auth_role, "jwt": jwt}
         login_result = http_post(
-            self.__vault_addr + login_path, data=vault_login_jwt_data,
+            self.__base_v1 + login_path, data=vault_login_jwt_data,
         )
 
-        if login_result and dotted_get("auth.client_token", login_result):
-            self.__vault_token_lease_time = datetime.now()
-            self.__vault_token = dotted_get("auth.client_token", login_result)
-            self.__vault_accessor = dotted_get("auth.accessor", login_result)
-            self.__vault_token_lease_duration = dotted_get(
-                "auth.lease_duration", login_result
+        client_token = _GET_AUTH_TOKEN(login_result) if login_result else None
+        if client_token:
+            self.__vault_token_lease_time = time.monotonic()
+            self.set_vault_token(client_token)
+            self.__vault_accessor = _GET_AUTH_ACCESSOR(login_result)
+            self.__vault_token_lease_duration = (
+                _GET_AUTH_LEASE_DURATION(login_result) or 0
             )
-            self.__vault_policies = dotted_get("auth.policies", login_result)
+            self.__vault_policies = _GET_AUTH_POLICIES(login_result)
             self.__authenticated = True
             return True
 
         return False
 
-    def __read_element(self, path: str, key: str) -> Optional[Dict[str, Any]]:
-        current_time = datetime.now()
-
+    def __read_element(self, path: str, key: str) -> Tuple[Any, float]:
+        # Returns the value and the monotonic time until which it may be cached,
+        # 0.0 when it must not be cached.
         if not path or not key:
-            return None
+            return None, 0.0
 
-        if path[0] != "/":
+        if not path.startswith("/"):
             path = "/" + path
+        # Interned paths let the cache lookups below match on identity
+        path = sys.intern(path)
 
         if not self.__authenticated:
             self.login()
 
-        if self.__vault_token_lease_duration > 0:
-            seconds_since_token_lease = (
-                datetime.now() - self.__vault_token_lease_time
-            ).seconds
-
-            if float(seconds_since_token_lease) > (
-                float(self.__vault_token_lease_duration) * (2.0 / 3.0)
-            ):
-                self.login()
-
-        if path not in self.__secrets.keys():
-            logging.debug("Secret is new")
-            self.__secrets[path] = VaultClient.VaultSecret(path=path)
+        # A static token from VAULT_TOKEN has no lease duration and is never renewed
+        token_lease_duration = self.__vault_token_lease_duration
+        if token_lease_duration and (
+            time.monotonic() - self.__vault_token_lease_time
+        ) > token_lease_duration * (2.0 / 3.0):
+            self.login()
 
-        secret: VaultClient.VaultSecret = self.__secrets[path]
+        secrets = self.__secrets
+        secret = secrets.get(path)
+        if secret is None:
+            _LOG.debug("Secret is new")
+            secret = VaultClient.VaultSecret(path=path, url=self.__base_v1 + path)
+            secrets[path] = secret
+            if len(secrets) > self.__secret_cache_size:
+                # Evict the least recently read secret
+                secrets.popitem(last=False)
+        else:
+            try:
+                secrets.move_to_end(path)
+            except KeyError:
+                # Evicted by a concurrent reader
+                pass
 
         if not secret.leased:
             # No lease yet
-            self.__secrets[path] = self.__get_secret(secret)
+            self.__fetch_secret(secret)
         else:
-            if not self.__secrets[path].lease_time:
+            if not secret.lease_time:
                 raise ValueError("Missing existing secret value when checking lease.")
-            assert isinstance(self.__secrets[path].lease_time, datetime)
-            assert isinstance(current_time, datetime)
-            seconds_since_secret_lease = (
-                current_time - self.__secrets[path].lease_time  # type: ignore
-            ).seconds
-            if seconds_since_secret_lease >= self.__secrets[path].lease_duration:  # type: ignore
+            seconds_since_secret_lease = time.monotonic() - secret.lease_time
+            if seconds_since_secret_lease <= secret.two_thirds_f:
+                # Not expired and not ready for renewal yet
+                pass
+            elif seconds_since_secret_lease >= secret.lease_duration_f:
                 # Lease expired
-                self.__secrets[path] = self.__get_secret(secret)
-            elif float(seconds_since_secret_lease) > (
-                float(secret.lease_duration) * (2.0 / 3.0)
-            ):
-                if secret.renewable:
-                    if not self.__secrets[path].update_lock:
-                        self.__secrets[path].update_lock = True
+                self.__fetch_secret(secret)
+            elif secret.update_lock.acquire(blocking=False):
+                # Only the reader that wins the lock starts a background refresh,
+                # the lock is released once the renew or update task is done.
+                try:
+                    if secret.renewable:
                         self.__renew_secret(secret)
-                else:
-                    # Lease is not renewable
-                    if not self.__secrets[path].update_lock:
-                        self.__secrets[path].update_lock = True
+                    else:
+                        # Lease is not renewable
                         self.__update_secret(secret)
-            else:
-                # Not expired and not ready for renewal yet
-                pass
-
-        if not self.__secrets[path].value:
+                except BaseException:
+                    secret.update_lock.release()
+                    raise
+
+        # Snapshot the lease before the value and check that it did not change
+        # while reading, so a concurrent refresh can never pair a stale value with
+        # the new lease's deadline.
+        lease_time = secret.lease_time
+        two_thirds = secret.two_thirds_f
+        value = secret.value
+        if not value:
             raise ValueError("Missing secret value after being read.")
 
-        if self.__secrets[path].leased:
-            return dotted_get(key, self.__secrets[path].value)  # type: ignore
-        else:
-            return None
+        if not secret.leased:
+            return None, 0.0
+        expires = 0.0
+        if two_thirds and secret.lease_time == lease_time:
+            expires = lease_time + two_thirds
+        return dotted_get(key, value), expires
+
+    def __fetch_secret(self, secret: "VaultSecret"):
+        # Concurrent readers of the same path share a single Vault request, the
+        # first one fetches and the others wait for it to update the secret.
+        with self.__inflight_lock:
+            event = self.__inflight.get(secret.path)
+            if event is None:
+                event = self.__inflight[secret.path] = threading.Event()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            event.wait()
+            if not secret.leased:
+                # The leader updated another object for this path, e.g. one created
+                # after this secret was evicted, or its request failed
+                self.__fetch_secret(secret)
+            return
+
+        try:
+            self.__get_secret(secret)
+        finally:
+            with self.__inflight_lock:
+                del self.__inflight[secret.path]
+            event.set()
 
     def __get_secret(self, secret: "VaultSecret"):
-        vault_headers = {"X-Vault-Token": self.__vault_token}
-        secret_response = http_get(
-            self.__vault_addr + "/v1" + secret.path, headers=vault_headers
-        )
+        secret_response = http_get(secret.url, headers=self.__vault_headers)
 
         if secret_response:
-            secret.lease_time = datetime.now()
+            # The lease time is written last, a reader that sees it change knows
+            # the value and lease duration have already been replaced.
+            fetched_at = time.monotonic()
             secret.value = secret_response
-            secret.leased = True
-            if dotted_get("renewable", secret_response):
-                secret.renewable = dotted_get("renewable", secret_response)
-            if dotted_get("lease_duration", secret_response):
-                secret.lease_duration = dotted_get("lease_duration", secret_response)
+            renewable = _GET_RENEWABLE(secret_response)
+            if renewable:
+                secret.renewable = True
+            lease_duration = _GET_LEASE_DURATION(secret_response)
+            if lease_duration:
+                secret.lease_duration = lease_duration
             else:
                 secret.lease_duration = self.__default_kvv2_ttl
             # Implement TTL support for KV V2
-            if dotted_get("data.data.ttl", secret_response):
-                secret.lease_duration = int(
-                    dotted_get("data.data.ttl", secret_response)
-                )
-            if dotted_get("lease_id", secret_response):
-                secret.lease_id = dotted_get("lease_id", secret_response)
+            kv_ttl = _GET_KV2_TTL(secret_response)
+            if kv_ttl:
+                secret.lease_duration = int(kv_ttl)
+            secret.lease_duration_f = float(secret.lease_duration)
+            secret.two_thirds_f = secret.lease_duration_f * (2.0 / 3.0)
+            lease_id = _GET_LEASE_ID(secret_response)
+            if lease_id:
+                secret.lease_id = lease_id
+            secret.lease_time = fetched_at
+            secret.leased = True
 
         return secret
 
     def __renew_secret(self, secret: "VaultSecret"):
-        renewer = VaultClient.VaultSecretRenewThread(parent=self, secret=secret)
-        renewer.start()
+        future = _EXECUTOR.submit(self.__renew_worker, secret)
+        future.add_done_callback(lambda _: secret.update_lock.release())
 
     def __update_secret(self, secret: "VaultSecret"):
-        updater = VaultClient.VaultSecretUpdateThread(parent=self, secret=secret)
-        updater.start()
+        # The done callback also runs if the task is cancelled before it starts
+        future = _EXECUTOR.submit(self.__get_secret, secret)
+        future.add_done_callback(lambda _: secret.update_lock.release())
+
+    def __renew_worker(self, secret: "VaultSecret"):
+        renewal_data = {
+            "lease_id": secret.lease_id,
+            "increment": secret.lease_duration,
+        }
+
+        secret_response = http_post(
+            self.__renew_url,
+            data=renewal_data,
+            headers=self.__vault_headers,
+        )
 
-    @dataclass
+        lease_id = _GET_LEASE_ID(secret_response) if secret_response else None
+        if lease_id:
+            renewed_at = time.monotonic()
+            secret.lease_id = lease_id
+            secret.renewable = bool(_GET_RENEWABLE(secret_response))
+            secret.lease_duration = _GET_LEASE_DURATION(secret_response)
+            secret.lease_duration_f = float(secret.lease_duration)
+            secret.two_thirds_f = secret.lease_duration_f * (2.0 / 3.0)
+            secret.lease_time = renewed_at
+
+    @dataclass(**_DATACLASS_SLOTS)
     class VaultSecret:
         path: str
+        url: str = ""
         value: Optional[Dict[Any, Any]] = None
         lease_id: Optional[str] = None
-        lease_time: Optional[datetime] = None
+        # Lease start as a time.monotonic() reading
+        lease_time: float = 0.0
         lease_duration: int = 0
-        leased: Optional[bool] = False
-        renewable: Optional[bool] = False
-        update_lock: Optional[bool] = False
-
-    class VaultSecretUpdateThread(threading.Thread):
-        def __init__(self, parent, secret: "VaultClient.VaultSecret"):
-            self.parent = parent
-            self.secret = secret
-            thread = threading.Thread(target=self.run, args=())
-            thread.daemon = True
-            super().__init__()
-
-        def run(self):
-
-            self.parent._VaultClient__secrets[
-                self.secret.path
-            ] = self.parent._VaultClient__get_secret(self.secret)
-            self.parent._VaultClient__secrets[self.secret.path].update_lock = False
-
-    class VaultSecretRenewThread(threading.Thread):
-        def __init__(self, parent, secret: "VaultClient.VaultSecret"):
-            self.parent = parent
-            self.secret = secret
-            thread = threading.Thread(target=self.run, args=())
-            thread.daemon = True
-            super().__init__()
-
-        def run(self):
-            vault_headers = {"X-Vault-Token": self.parent._VaultClient__vault_token}
-            renewal_data = {
-                "lease_id": self.secret.lease_id,
-                "increment": self.secret.lease_duration,
-            }
-
-            secret_response = http_post(
-                self.parent._VaultClient__vault_addr + "/v1/sys/leases/renew",
-                headers=vault_headers,
-                data=renewal_data,
-            )
-
-            if secret_response and dotted_get("lease_id", secret_response):
-                self.secret.lease_time = datetime.now()
-                self.secret.lease_id = dotted_get("lease_id", secret_response)
-                self.secret.renewable = dotted_get("renewable", secret_response)
-                self.secret.lease_duration = dotted_get(
-                    "lease_duration", secret_response
-                )
-
-            self.secret.update_lock = False
-            self.parent._VaultClient__secrets[self.secret.path] = self.secret
+        lease_duration_f: float = 0.0
+        two_thirds_f: float = 0.0
+        leased: bool = False
+        renewable: bool = False
+        update_lock: threading.Lock = field(default_factory=threading.Lock)